@@ -1,7 +1,8 @@
 import pandas as pd
 import numpy as np
-import math
 import matplotlib.pyplot as plt
+from knn import KNNClassifier
+from cross_validation import parallel_map, stratified_k_fold
 
 
 def f1_score(actual, predicted):
@@ -30,6 +31,32 @@ def minmax_scale(df_in):
     return df_norm
 
 
+def evaluate_fold(task, seed):
+    # Accuracy and macro F1 of every k on one fold, ranking the neighbours once
+    k_fold, fold_idx, k_list = task
+    print('fold_idx = ', fold_idx)
+    # Split to train and test dataset
+    k_fold_copy = k_fold.copy()
+    data_test = k_fold[fold_idx]
+    del k_fold_copy[fold_idx]
+    n_train = sum(map(len, k_fold)) - len(data_test.index)
+    data_train = pd.concat(k_fold_copy).sample(n=n_train, replace=True, random_state=587)
+    X_train = data_train.drop('Survived', axis=1).values
+    y_train = data_train['Survived'].values.astype(int)
+    X_test = data_test.drop('Survived', axis=1).values
+    y_test = data_test['Survived'].values.astype(int)
+
+    y_pred_k = KNNClassifier(exact=True).fit(X_train, y_train).predict_many_k(X_test, k_list)
+    y_test = y_test.tolist()
+    accuracy_k = []
+    f1_k = []
+    for y_pred in y_pred_k:
+        y_pred = y_pred.tolist()
+        f1_k.append(f1_macro(y_test, y_pred))
+        accuracy_k.append(np.sum(np.array(y_pred) == np.array(y_test)) / len(y_test))
+    return accuracy_k, f1_k
+
+
 if __name__ == '__main__':
     # Load data
     df = pd.read_csv('titanic.csv', sep=',')
@@ -40,64 +67,22 @@ if __name__ == '__main__':
     df = minmax_scale(df)
     df.insert(len(df.columns), 'Survived', col_class)
 
-    list_target = df['Survived'].unique()
-    df1 = df[df['Survived'].isin([list_target[0]])]
-    df0 = df[df['Survived'].isin([list_target[1]])]
     # Split into folds
-    k_fold = []
-    fold_size1 = math.ceil(len(df1) / 10)
-    fold_size0 = math.ceil(len(df0) / 10)
-    for k in range(0, 9):
-        fold1 = df1.sample(n=fold_size1, random_state=587)
-        fold0 = fold1.append(df0.sample(n=fold_size0, random_state=587))
-        df1 = df1[~df1.index.isin(fold1.index)]
-        df0 = df0[~df0.index.isin(fold0.index)]
-        k_fold.append(fold0)
-    k_fold.append(df1.append(df0))
+    k_fold = [df.iloc[idx] for idx in stratified_k_fold(df['Survived'].values, rounding='ceil', seed=587)]
 
     k_list = range(1, 202, 20)
     final_accuracy = {}
 
-    # Train the k-NN algorithm using training set
+    # The folds are independent, so they run in parallel
+    tasks = [(k_fold, fold_idx, k_list) for fold_idx in range(10)]
+    results = parallel_map(evaluate_fold, tasks, n_jobs=-1, seed=587)
+
     accuracy = []
     f1 = []
-    for k in k_list:
+    for i, k in enumerate(k_list):
         print('k = ', k)
-        fold_idx = 0
-        accuracy_k = []
-        f1_k = []
-        while fold_idx < 10:
-            print('fold_idx = ', fold_idx)
-            # Split to train and test dataset
-            k_fold_copy = k_fold.copy()
-            data_test = k_fold[fold_idx]
-            del k_fold_copy[fold_idx]
-            data_train = pd.concat(k_fold_copy).sample(n=len(df) - len(data_test.index), replace=True, random_state=587)
-            X_train = data_train.drop('Survived', axis=1).values
-            y_train = data_train['Survived'].values.astype(int)
-            X_test = data_test.drop('Survived', axis=1).values
-            y_test = data_test['Survived'].values.astype(int)
-
-            X_train = pd.DataFrame(X_train)
-            X_test = pd.DataFrame(X_test)
-            y_train = pd.Series(y_train.tolist())
-            y_test = pd.Series(y_test.tolist())
-
-            y_pred = []
-            for index1, row1 in X_test.iterrows():
-                x = row1.values
-                distance = [np.sqrt(np.sum((row2.values - x) ** 2)) for index2, row2 in X_train.iterrows()]
-                idx_sort = np.argsort(distance)
-                y_idx_sort = y_train.values[idx_sort]
-                y_top_k = y_idx_sort[:k]
-                pred = max(set(y_top_k), key=y_top_k.tolist().count)
-                y_pred.append(pred)
-            y_test = y_test.tolist()
-            f1_i = f1_macro(y_test, y_pred)
-            accuracy_i = np.sum(np.array(y_pred) == np.array(y_test)) / len(y_test)
-            f1_k.append(f1_i)
-            accuracy_k.append(accuracy_i)
-            fold_idx += 1
+        accuracy_k = [accuracy_fold[i] for accuracy_fold, f1_fold in results]
+        f1_k = [f1_fold[i] for accuracy_fold, f1_fold in results]
         f1_avg = sum(f1_k) / len(f1_k)
         accuracy_avg = sum(accuracy_k) / len(accuracy_k)
         print('accuracy_avg = ', accuracy_avg)
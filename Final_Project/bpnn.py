@@ -0,0 +1,371 @@
+import numpy as np
+
+OPTIMIZERS = ['sgd', 'momentum', 'nesterov', 'rmsprop', 'adam']
+OUTPUTS = ['sigmoid', 'softmax']
+
+
+def sigmoid(z, out=None):
+    # With out, computed in place in out (which may be z itself)
+    if out is None:
+        return 1 / (1 + np.exp(-z))
+    np.negative(z, out=out)
+    np.exp(out, out=out)
+    np.add(out, 1, out=out)
+    return np.reciprocal(out, out=out)
+
+
+def d_sigmoid(h, out=None):
+    if out is None:
+        return h * (1 - h)
+    np.subtract(1, h, out=out)
+    return np.multiply(h, out, out=out)
+
+
+def tanh(z, out=None):
+    return np.tanh(z, out=out)
+
+
+def d_tanh(h, out=None):
+    if out is None:
+        return 1 - h * h
+    np.multiply(h, h, out=out)
+    return np.subtract(1, out, out=out)
+
+
+def relu(z, out=None):
+    return np.maximum(z, 0, out=out)
+
+
+def d_relu(h, out=None):
+    # The derivative from the activated value h, 1 where the unit is active and 0 elsewhere
+    if out is None:
+        return (h > 0).astype(float)
+    return np.greater(h, 0, out=out)
+
+
+def softmax(z, out=None, row_max=None):
+    # Row-wise softmax over the last axis, shifted by the row maximum so exp never overflows. With out (which may
+    # be z itself) and row_max, a buffer of shape z.shape[:-1] + (1,), computed in place
+    if out is None:
+        out = np.empty_like(z)
+    if row_max is None:
+        row_max = np.empty(z.shape[:-1] + (1,))
+    np.max(z, axis=-1, keepdims=True, out=row_max)
+    np.subtract(z, row_max, out=out)
+    np.exp(out, out=out)
+    np.sum(out, axis=-1, keepdims=True, out=row_max)
+    return np.divide(out, row_max, out=out)
+
+
+# Hidden-layer activations with their derivative as a function of the activated value, and the scale of the
+# initial weights (times 1 / sqrt(inputs), None to keep the standard normal) that keeps deep stacks of them trainable
+ACTIVATIONS = {'sigmoid': (sigmoid, d_sigmoid, None), 'tanh': (tanh, d_tanh, 1.0), 'relu': (relu, d_relu, 2 ** 0.5)}
+
+
+def add_bias(x, out=None):
+    # x with a leading column of ones, written into out when a buffer of shape (rows, columns + 1) is given
+    if out is None:
+        out = np.empty((x.shape[0], x.shape[1] + 1), dtype=np.result_type(x.dtype, np.int64))
+    out[:, 0] = 1
+    out[:, 1:] = x
+    return out
+
+
+class BPNNClassifier:
+    def __init__(self, in_n, hid_l=1, hid_n=4, out_n=2, eta=0.1, lmbda=0.02, max_iter=200, batch_size=1,
+                 optimizer='sgd', beta1=0.9, beta2=0.999, epsilon=1e-8, activation='sigmoid', output='sigmoid'):
+        if batch_size is not None and batch_size < 1:
+            raise Exception("argument value error: batch_size should be a positive integer or None")
+        if optimizer not in OPTIMIZERS:
+            raise Exception("argument value error: optimizer should be one of " + ", ".join(OPTIMIZERS))
+        if activation not in ACTIVATIONS:
+            raise Exception("argument value error: activation should be one of " + ", ".join(ACTIVATIONS))
+        if output not in OUTPUTS:
+            raise Exception("argument value error: output should be one of " + ", ".join(OUTPUTS))
+        self.in_n = in_n
+        self.hid_l = hid_l + 1
+        self.hid_n = hid_n
+        self.out_n = out_n
+        self.eta = eta
+        self.lmbda = lmbda
+        self.max_iter = max_iter
+        self.batch_size = batch_size  # rows per weight update, None for the whole training set
+        # Update rule with learning rate eta * (1 - lmbda): beta1 is the momentum (and Adam's first moment decay),
+        # beta2 the squared-gradient decay of RMSProp and Adam, epsilon their denominator guard
+        self.optimizer = optimizer
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.epsilon = epsilon
+        # Hidden-layer activation, and the output layer: 'sigmoid' units trained on the squared error, or 'softmax'
+        # trained on the cross-entropy, whose gradient at the output is simply y - p (with two classes the single
+        # sigmoid unit is the two-class softmax, so it keeps that unit and takes the cross-entropy gradient)
+        self.activation = activation
+        self.output = output
+        self.weights = []
+        self.grad = list(range(self.hid_l))  # save the gradient of every neuron
+        self.values = []  # save the activated value of every neuron
+        self.n_iter = 0  # epochs run by the last fit
+        self.cost_history = []  # training cost J per epoch, when fit monitors a validation set
+        self.validation_cost_history = []  # validation cost J per epoch
+
+        for d in range(self.hid_l):
+            if d == 0:  # input layer to hidden layer
+                weight = np.random.randn(self.hid_n, in_n + 1)
+            elif d == self.hid_l - 1:  # hidden layer to output layer
+                out_n = 1 if out_n == 2 else out_n
+                weight = np.random.randn(out_n, self.hid_n)
+            else:  # the others
+                out_n = 1 if out_n == 2 else out_n
+                weight = np.random.randn(self.hid_n, self.hid_n)
+            if ACTIVATIONS[activation][2] is not None:
+                weight *= ACTIVATIONS[activation][2] / np.sqrt(weight.shape[1])
+            self.weights.append(weight)
+
+    def linear_input(self, hid_l, x):
+        weight = self.weights[hid_l]
+        return x @ np.swapaxes(weight, -1, -2)
+
+    def preprocessing(self, x=None, y=None):
+        x_y = []
+        if isinstance(x, np.ndarray):
+            x_y.append(add_bias(x))
+        if isinstance(y, np.ndarray):
+            x_y.append(self.encoder(y))
+        return tuple(x_y)
+
+    def encoder(self, y):
+        if y.ndim == 1:  # encode y to one hot code
+            if self.out_n > 2:
+                return np.eye(self.out_n)[y]
+            return y
+        elif y.ndim == 2:  # encode y to 1D array
+            if self.out_n > 2:
+                return np.argmax(y == 1, axis=1)
+            return y.ravel()
+        else:
+            raise Exception("argument value error: ndarray ndim should be 1 or 2")
+
+    def allocate_buffers(self, n_rows):
+        # Activation, gradient, activation derivative and weight-update buffers of every layer for batches of n_rows
+        # rows, the transposed views the in-place matmuls read through, and the row maxima of the softmax
+        values = [np.empty(weight.shape[:-2] + (n_rows, weight.shape[-2])) for weight in self.weights]
+        grad = [np.empty_like(value) for value in values]
+        return {'values': values, 'grad': grad, 'd_values': [np.empty_like(value) for value in values],
+                'delta': [np.empty(weight.shape) for weight in self.weights],
+                'weights_t': [np.swapaxes(weight, -1, -2) for weight in self.weights],
+                'grad_t': [np.swapaxes(value, -1, -2) for value in grad],
+                'row_max': np.empty(values[-1].shape[:-1] + (1,))}
+
+    def allocate_optimizer_state(self):
+        # Per-layer optimizer state for one fit: velocity (momentum, Nesterov) or first moment (Adam), squared
+        # gradient average (RMSProp, Adam), a scratch array, and the number of updates made
+        return {'velocity': [np.zeros(weight.shape) for weight in self.weights],
+                'square': [np.zeros(weight.shape) for weight in self.weights],
+                'scratch': [np.empty(weight.shape) for weight in self.weights], 'step': 0}
+
+    def update_weight(self, d, delta, n_rows, state):
+        # Apply the summed batch gradient delta of layer d in place; delta is overwritten
+        weight = self.weights[d]
+        np.divide(delta, n_rows, out=delta)
+        if self.optimizer == 'sgd':
+            np.multiply(delta, self.eta, out=delta)
+            np.multiply(delta, 1 - self.lmbda, out=delta)
+            np.add(weight, delta, out=weight)
+            return
+        rate = self.eta * (1 - self.lmbda)
+        velocity = state['velocity'][d]
+        square = state['square'][d]
+        scratch = state['scratch'][d]
+        if self.optimizer in ['momentum', 'nesterov']:
+            np.multiply(velocity, self.beta1, out=velocity)
+            np.multiply(delta, rate, out=delta)
+            np.add(velocity, delta, out=velocity)
+            if self.optimizer == 'momentum':
+                np.add(weight, velocity, out=weight)
+            else:  # step along the updated velocity, looking one momentum step ahead
+                np.multiply(velocity, self.beta1, out=scratch)
+                np.add(scratch, delta, out=scratch)
+                np.add(weight, scratch, out=weight)
+            return
+        if self.optimizer == 'adam':
+            np.multiply(velocity, self.beta1, out=velocity)
+            np.multiply(delta, 1 - self.beta1, out=scratch)
+            np.add(velocity, scratch, out=velocity)
+        np.multiply(square, self.beta2, out=square)
+        np.multiply(delta, delta, out=scratch)
+        np.multiply(scratch, 1 - self.beta2, out=scratch)
+        np.add(square, scratch, out=square)
+        if self.optimizer == 'rmsprop':
+            np.sqrt(square, out=scratch)
+            np.add(scratch, self.epsilon, out=scratch)
+            np.divide(delta, scratch, out=scratch)
+            np.multiply(scratch, rate, out=scratch)
+        else:  # adam, with bias-corrected moments
+            np.divide(square, 1 - self.beta2 ** state['step'], out=scratch)
+            np.sqrt(scratch, out=scratch)
+            np.add(scratch, self.epsilon, out=scratch)
+            np.divide(velocity, scratch, out=scratch)
+            np.multiply(scratch, rate / (1 - self.beta1 ** state['step']), out=scratch)
+        np.add(weight, scratch, out=weight)
+
+    def forward_propagation(self, x, buffers=None):
+        # With buffers from allocate_buffers every activation is written in place
+        activation = ACTIVATIONS[self.activation][0]
+        if buffers is not None:
+            self.values = buffers['values']
+            value = x
+            for d in range(self.hid_l):
+                z = np.matmul(value, buffers['weights_t'][d], out=self.values[d])
+                if d < self.hid_l - 1:
+                    value = activation(z, out=z)
+                elif self.output == 'softmax' and self.out_n > 2:
+                    value = softmax(z, out=z, row_max=buffers['row_max'])
+                else:
+                    value = sigmoid(z, out=z)
+            return value
+        self.values = []
+        value = None
+        for d in range(self.hid_l):
+            if d == 0:  # input layer to hidden layer
+                value = activation(self.linear_input(d, x))
+            elif d == self.hid_l - 1:  # hidden layer to output layer, use sigmoid or softmax
+                if self.output == 'softmax' and self.out_n > 2:
+                    value = softmax(self.linear_input(d, value))
+                else:
+                    value = sigmoid(self.linear_input(d, value))
+            else:  # the others
+                value = activation(self.linear_input(d, value))
+            self.values.append(value)
+        return value
+
+    def back_propagation(self, y_true, buffers=None):
+        # With buffers from allocate_buffers every gradient is written in place
+        # The cross-entropy output gradient is y - p itself; the squared error one also carries d_sigmoid
+        d_activation = ACTIVATIONS[self.activation][1]
+        if buffers is not None:
+            self.grad = buffers['grad']
+            for d in range(self.hid_l - 1, -1, -1):
+                if d == self.hid_l - 1:  # hidden layer to output layer
+                    np.subtract(y_true, self.values[d], out=self.grad[d])
+                    if self.output == 'sigmoid':
+                        np.multiply(self.grad[d], d_sigmoid(self.values[d], out=buffers['d_values'][d]),
+                                    out=self.grad[d])
+                else:
+                    np.matmul(self.grad[d + 1], self.weights[d + 1], out=self.grad[d])
+                    np.multiply(self.grad[d], d_activation(self.values[d], out=buffers['d_values'][d]),
+                                out=self.grad[d])
+            return
+        for d in range(self.hid_l - 1, -1, -1):
+            if d == self.hid_l - 1:  # hidden layer to output layer
+                if self.output == 'sigmoid':
+                    self.grad[d] = (y_true - self.values[d]) * d_sigmoid(self.values[d])
+                else:
+                    self.grad[d] = y_true - self.values[d]
+            else:
+                self.grad[d] = self.grad[d + 1] @ self.weights[d + 1] * d_activation(self.values[d])
+
+    def cost(self, x, y):
+        # Cross-entropy cost J of the network on preprocessed rows x and encoded labels y: per output unit for
+        # sigmoid outputs, over the classes for a softmax output
+        prob = np.clip(self.forward_propagation(x), np.finfo(float).eps, 1 - np.finfo(float).eps)
+        y = y.reshape(prob.shape[-2:])
+        if self.output == 'softmax' and self.out_n > 2:
+            return -np.sum(y * np.log(prob), axis=(-2, -1)) / len(x)
+        return -np.sum(y * np.log(prob) + (1 - y) * np.log(1 - prob), axis=(-2, -1)) / len(x)
+
+    def standard_bp(self, x, y, x_val=None, y_val=None, patience=10, tol=1e-4):
+        # Every update averages the gradient over batch_size consecutive rows, so batch_size=1 is per-sample SGD.
+        # With a validation set, stop once its cost J has not dropped by more than tol for patience epochs and
+        # keep the weights of the best epoch
+        batch_size = len(x) if self.batch_size is None else self.batch_size
+        y = y.reshape(len(y), -1)
+        self.cost_history = []
+        self.validation_cost_history = []
+        best_cost = np.inf
+        best_weights = None
+        wait = 0
+        # The batches and their buffers are set up once, so the epoch loop allocates nothing
+        buffers = {}
+        batches = []
+        state = self.allocate_optimizer_state()
+        for start in range(0, len(x), batch_size):
+            xb = x[start:start + batch_size]
+            if len(xb) not in buffers:
+                buffers[len(xb)] = self.allocate_buffers(len(xb))
+            batches.append((xb, y[start:start + batch_size], len(xb), buffers[len(xb)]))
+        for epoch in range(self.max_iter):
+            for xb, yb, n_rows, batch_buffers in batches:
+                # forward propagation
+                self.forward_propagation(xb, batch_buffers)
+                # back propagation
+                self.back_propagation(yb, batch_buffers)
+                # update weight
+                state['step'] += 1
+                for d in range(self.hid_l):
+                    layer_input = xb if d == 0 else self.values[d - 1]
+                    delta = np.matmul(batch_buffers['grad_t'][d], layer_input, out=batch_buffers['delta'][d])
+                    self.update_weight(d, delta, n_rows, state)
+            self.n_iter = epoch + 1
+            if x_val is None:
+                continue
+            # early stopping
+            self.cost_history.append(self.cost(x, y))
+            self.validation_cost_history.append(self.cost(x_val, y_val))
+            if self.validation_cost_history[-1] < best_cost - tol:
+                best_cost = self.validation_cost_history[-1]
+                best_weights = [weight.copy() for weight in self.weights]
+                wait = 0
+            else:
+                wait += 1
+                if wait >= patience:
+                    break
+        if best_weights is not None:
+            self.weights = best_weights
+
+    def fit(self, x, y, validation_split=None, patience=10, tol=1e-4):
+        # validation_split holds out that fraction of the rows, drawn at random, to stop training early
+        x, y = self.preprocessing(x, y)
+        x_val = None
+        y_val = None
+        if validation_split is not None:
+            if not 0 < validation_split < 1:
+                raise Exception("argument value error: validation_split should be between 0 and 1")
+            order = np.random.permutation(len(x))
+            n_val = max(1, int(round(len(x) * validation_split)))
+            x_val, y_val = x[order[:n_val]], y[order[:n_val]]
+            x, y = x[order[n_val:]], y[order[n_val:]]
+        self.standard_bp(x, y, x_val, y_val, patience, tol)
+        return self
+
+    def predict(self, x, probability=False):
+        x = self.preprocessing(x)[0]
+        prob = self.forward_propagation(x)
+        if self.out_n == 2:  # binary classification
+            y = np.where(prob >= 0.5, 1, 0)[..., 0]
+        else:  # multiply classification
+            y = np.argmax(prob, axis=-1)
+        if probability:
+            return y, prob
+        else:
+            return y
+
+
+class BPNNEnsemble(BPNNClassifier):
+    # n_replicas networks of the same architecture trained side by side on the same data. The weights of every
+    # layer are stacked into a (replica, out, in) array, so one batched matmul runs a layer for all the replicas;
+    # predict and cost return one result per replica. The replicas draw their initial weights in turn, exactly
+    # like n_replicas BPNNClassifier created one after another.
+    def __init__(self, n_replicas, in_n, hid_l=1, hid_n=4, out_n=2, eta=0.1, lmbda=0.02, max_iter=200, batch_size=1,
+                 optimizer='sgd', beta1=0.9, beta2=0.999, epsilon=1e-8, activation='sigmoid', output='sigmoid'):
+        replicas = [BPNNClassifier(in_n, hid_l, hid_n, out_n, eta, lmbda, max_iter, batch_size, optimizer, beta1, beta2,
+                                   epsilon, activation, output) for _ in range(n_replicas)]
+        vars(self).update(vars(replicas[0]))
+        self.n_replicas = n_replicas
+        self.weights = [np.stack(weights) for weights in zip(*[replica.weights for replica in replicas])]
+        self.grad = list(range(self.hid_l))
+        self.values = []
+
+    def fit(self, x, y):
+        x, y = self.preprocessing(x, y)
+        self.standard_bp(x, y)
+        return self
@@ -0,0 +1,45 @@
+import time
+import numpy as np
+import pandas as pd
+from sklearn import datasets
+from bpnn import BPNNClassifier
+
+
+def minmax_scale(df_in):
+    df_norm = (df_in - df_in.min()) / (df_in.max() - df_in.min())
+    return df_norm
+
+
+def load_digits():
+    digits = datasets.load_digits(return_X_y=True)
+    df = minmax_scale(pd.DataFrame(digits[0]))
+    df = df.drop(df.columns[[0, 32, 39]], axis=1)
+    return df.values, digits[1]
+
+
+def time_to_target(x, y, target, max_iter, **params):
+    # Epochs and seconds of training until the validation cost J first reaches target (None when it never does),
+    # and the best validation cost. Early stopping is off (patience = max_iter) so every run sees all its epochs
+    np.random.seed(587)
+    classifier = BPNNClassifier(in_n=61, hid_l=8, hid_n=16, out_n=10, lmbda=0.05, max_iter=max_iter, **params)
+    start = time.perf_counter()
+    classifier.fit(x, y, validation_split=0.2, patience=max_iter)
+    per_epoch = (time.perf_counter() - start) / classifier.n_iter
+    reached = np.flatnonzero(np.array(classifier.validation_cost_history) <= target)
+    if len(reached) == 0:
+        return None, None, min(classifier.validation_cost_history)
+    return reached[0] + 1, (reached[0] + 1) * per_epoch, min(classifier.validation_cost_history)
+
+
+if __name__ == '__main__':
+    x, y = load_digits()
+    target = 0.6
+    settings = [dict(optimizer='sgd', eta=0.1, batch_size=1), dict(optimizer='sgd', eta=0.1, batch_size=32),
+                dict(optimizer='momentum', eta=0.01, batch_size=1), dict(optimizer='nesterov', eta=0.5, batch_size=16),
+                dict(optimizer='rmsprop', eta=0.005, batch_size=32), dict(optimizer='adam', eta=0.01, batch_size=32)]
+    print('Digits network (8 hidden layers of 16), time until the validation cost J reaches', target)
+    for params in settings:
+        epochs, seconds, best = time_to_target(x, y, target, 200, **params)
+        reached = 'never' if epochs is None else '%3d epochs  %6.2f s' % (epochs, seconds)
+        print('%-8s eta = %-5g batch_size = %-2d  %-20s  best J = %.3f' %
+              (params['optimizer'], params['eta'], params['batch_size'], reached, best))
@@ -0,0 +1,80 @@
+import time
+import pandas as pd
+import numpy as np
+from knn import KNNClassifier
+
+
+def minmax_scale(df_in):
+    df_norm = (df_in - df_in.min()) / (df_in.max() - df_in.min())
+    return df_norm
+
+
+def load_titanic():
+    df = pd.read_csv('titanic.csv', sep=',')
+    df = df.drop(columns=['Name'])
+    df = df.replace('female', 0)
+    df = df.replace('male', 1)
+    col_class = df.pop('Survived')
+    return minmax_scale(df).values.astype(float), col_class.values.astype(int)
+
+
+def load_loan():
+    df = pd.read_csv('loan.csv', sep=',')
+    df = df.drop(columns=['Loan_ID'])
+    for old, new in [('Female', 0), ('Male', 1), ('N', 0), ('Y', 1), ('No', 0), ('Yes', 1), ('Not Graduate', 0),
+                     ('Graduate', 1), ('Rural', 0), ('Semiurban', 1), ('Urban', 2), ('3+', 3), ('2', 2), ('1', 1),
+                     ('0', 0)]:
+        df = df.replace(old, new)
+    col_class = df.pop('Loan_Status')
+    return minmax_scale(df).values.astype(float), col_class.values.astype(int)
+
+
+def load_parkinson():
+    df = pd.read_csv('parkinsons.csv', sep=',')
+    col_class = df.pop('Diagnosis')
+    return minmax_scale(df).values.astype(float), col_class.values.astype(int)
+
+
+def grow(x, y, n, rng):
+    # Resample the table to n rows with a little jitter, standing in for a production-sized table
+    idx = rng.integers(0, len(x), n)
+    return x[idx] + rng.normal(0, 0.01, (n, x.shape[1])), y[idx]
+
+
+def time_query(classifier, x_train, y_train, x_test, k):
+    start = time.perf_counter()
+    classifier.fit(x_train, y_train)
+    fit_time = time.perf_counter() - start
+    start = time.perf_counter()
+    classifier.kneighbors(x_test, k)
+    return fit_time, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(587)
+    k = 11
+    n_query = 200
+    datasets = [('titanic', load_titanic(), 'kd_tree'), ('loan', load_loan(), 'kd_tree'),
+                ('parkinson', load_parkinson(), 'ball_tree')]
+
+    # Leaf size tuning on the tables resampled to 20000 jittered rows
+    print('Leaf size tuning (query time in seconds for', n_query, 'queries, k =', k, ')')
+    for name, (x, y), algorithm in datasets:
+        x_train, y_train = grow(x, y, 20000, rng)
+        x_test = grow(x, y, n_query, rng)[0]
+        for leaf_size in [5, 10, 20, 40, 80, 160]:
+            classifier = KNNClassifier(algorithm=algorithm, leaf_size=leaf_size)
+            fit_time, query_time = time_query(classifier, x_train, y_train, x_test, k)
+            print('%-10s %-9s leaf_size = %4d  build = %.3f  query = %.3f' %
+                  (name, algorithm, leaf_size, fit_time, query_time))
+
+    # Brute force against the spatial index as the training set grows
+    print('Scaling with the training set size (query time in seconds)')
+    for name, (x, y), algorithm in datasets:
+        x_test = grow(x, y, n_query, rng)[0]
+        for n_train in [1000, 4000, 16000, 64000, 256000]:
+            x_train, y_train = grow(x, y, n_train, rng)
+            brute = time_query(KNNClassifier(), x_train, y_train, x_test, k)[1]
+            fit_time, query_time = time_query(KNNClassifier(algorithm=algorithm), x_train, y_train, x_test, k)
+            print('%-10s n = %6d  brute = %.3f  %s = %.3f  (build = %.3f)' %
+                  (name, n_train, brute, algorithm, query_time, fit_time))
@@ -0,0 +1,123 @@
+import math
+import random
+import numpy as np
+from decision_tree import encode_columns, grow_decision_tree, CompiledTree
+from cross_validation import parallel_map
+
+
+def fit_tree(task, seed):
+    # Grow one tree of the forest on its own bootstrap sample; module level so the process pool can unpickle it.
+    # Also returns the out-of-bag mask of the rows the bootstrap left out
+    codes, categories, attribute, sample_attribute_number, criterion = task
+    bootstrap = np.random.default_rng(seed).integers(0, len(codes), len(codes))
+    tree = grow_decision_tree(codes[bootstrap], categories, attribute, sample_attribute_number, criterion,
+                              random.Random(seed))
+    return tree, np.bincount(bootstrap, minlength=len(codes)) == 0
+
+
+def prefix_votes(predictions, n_list, mask=None):
+    # Majority label of every column of a (tree, row) prediction matrix, over the first n trees for every n in
+    # n_list, from one running tally. Ties go to the label predicted by the earliest tree, like
+    # max(votes, key=votes.count). A boolean (tree, row) mask keeps only the votes where it is True; a row
+    # with no vote gets the first label
+    labels, code = np.unique(predictions, return_inverse=True)
+    code = code.reshape(predictions.shape)
+    n_trees, n_rows = code.shape
+    if mask is None:
+        mask = np.ones(code.shape, dtype=bool)
+    first_tree = np.full((n_rows, len(labels)), n_trees)
+    for tree in range(n_trees - 1, -1, -1):
+        first_tree[np.arange(n_rows)[mask[tree]], code[tree][mask[tree]]] = tree
+    counts = np.zeros((n_rows, len(labels)), dtype=np.int64)
+    votes = {}
+    n_counted = 0
+    for n in sorted(set(n_list)):
+        counts += np.bincount((np.arange(n_rows) * len(labels) + code[n_counted:n]).ravel(),
+                              weights=mask[n_counted:n].ravel(),
+                              minlength=n_rows * len(labels)).reshape(n_rows, len(labels)).astype(np.int64)
+        n_counted = n
+        tied = counts == counts.max(1, keepdims=True)
+        votes[n] = labels[np.argmin(np.where(tied, first_tree, n_trees), axis=1)]
+    return [votes[n] for n in n_list]
+
+
+def majority_vote(predictions):
+    return prefix_votes(predictions, [len(predictions)])[0]
+
+
+def macro_f1(y_true, y_pred):
+    # F1 of every class of y_true against the rest, averaged over the classes
+    f1 = []
+    for label in np.unique(y_true):
+        tp = np.sum((y_pred == label) & (y_true == label))
+        fp_fn = np.sum((y_pred == label) != (y_true == label))
+        f1.append(2 * tp / (2 * tp + fp_fn))
+    return np.mean(f1)
+
+
+class RandomForest:
+    # Ensemble of decision trees grown on bootstrap samples, each split choosing among sample_attribute_number
+    # random attributes ('sqrt' for ceil(sqrt(number of attributes))). fit grows the trees in a process pool with
+    # n_jobs workers; every tree has its own seed spawned from seed, so the forest does not depend on n_jobs.
+    # With oob_score=True fit also sets oob_accuracy and oob_f1 (macro F1), scored on every training row from the
+    # vote of the trees whose bootstrap left it out.
+
+    def __init__(self, n_trees=10, sample_attribute_number='sqrt', criterion='entropy', n_jobs=1, seed=None,
+                 oob_score=False):
+        if criterion not in ['entropy', 'gini']:
+            raise Exception("argument value error: criterion must be 'entropy' or 'gini'")
+        self.n_trees = n_trees
+        self.sample_attribute_number = sample_attribute_number
+        self.criterion = criterion
+        self.n_jobs = n_jobs
+        self.seed = seed
+        self.oob_score = oob_score
+        self.trees = []
+        self.compiled = []
+        self.oob_mask = None
+
+    def fit(self, data_train):
+        # data_train is a DataFrame whose last column is the label
+        self.attribute = data_train.keys().to_list()
+        codes, categories = encode_columns(data_train.values)
+        m = self.sample_attribute_number
+        if m == 'sqrt':
+            m = math.ceil((len(self.attribute) - 1) ** 0.5)
+        task = (codes, categories, self.attribute, m, self.criterion)
+        results = parallel_map(fit_tree, [task] * self.n_trees, n_jobs=self.n_jobs, seed=self.seed)
+        self.trees = [tree for tree, _ in results]
+        self.oob_mask = np.array([oob for _, oob in results])
+        self.compiled = [CompiledTree(tree, self.attribute) for tree in self.trees]
+        if self.oob_score:
+            self.x_train = data_train.values
+            self.oob_accuracy, self.oob_f1 = self.oob_many_ntree([self.n_trees])[0]
+        return self
+
+    def predict_trees(self, x):
+        # (tree, row) matrix of the predictions of every tree; x has the columns of data_train
+        return np.array([tree.predict_batch(x) for tree in self.compiled])
+
+    def predict(self, x):
+        return majority_vote(self.predict_trees(x))
+
+    def predict_many_ntree(self, x, ntree_list):
+        # Predictions of the forests made of the first ntree trees, for every ntree in ntree_list
+        if max(ntree_list) > len(self.compiled):
+            raise Exception("argument value error: ntree larger than the number of trees")
+        return prefix_votes(self.predict_trees(x), ntree_list)
+
+    def oob_many_ntree(self, ntree_list):
+        # Out-of-bag accuracy and macro F1 of the forests made of the first ntree trees, for every ntree in
+        # ntree_list. Only the rows left out by at least one of the first ntree trees are scored; needs oob_score
+        if not self.oob_score:
+            raise Exception("argument value error: the forest was not fitted with oob_score=True")
+        if max(ntree_list) > len(self.compiled):
+            raise Exception("argument value error: ntree larger than the number of trees")
+        y_train = self.x_train[:, -1]
+        predictions = prefix_votes(self.predict_trees(self.x_train), ntree_list, self.oob_mask)
+        scores = []
+        for ntree, prediction in zip(ntree_list, predictions):
+            scored = self.oob_mask[:ntree].any(0)
+            scores.append((np.mean(prediction[scored] == y_train[scored]),
+                           macro_f1(y_train[scored], prediction[scored])))
+        return scores
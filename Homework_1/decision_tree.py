@@ -0,0 +1,292 @@
+import random
+import numpy as np
+from collections import Counter
+
+
+def encode_columns(data_input):
+    # Integer-code every column of a list-of-lists table; categories[j][code] is the original value
+    table = np.array(data_input)
+    categories = []
+    codes = np.empty(table.shape, dtype=np.int64)
+    for j in range(table.shape[1]):
+        column_categories, codes[:, j] = np.unique(table[:, j], return_inverse=True)
+        categories.append(column_categories.tolist())
+    return codes, categories
+
+
+def xlogx(values):
+    # x * log2(x) with 0 * log2(0) = 0
+    values = np.asarray(values, dtype=float)
+    return values * np.log2(np.where(values > 0, values, 1))
+
+
+def level_gains(x, y, rows, node_of_row, n_nodes, n_categories, n_classes, criterion='entropy'):
+    # Gain of splitting every node of a tree level on every column, from the (node, column, category, class)
+    # contingency table: dense while it is small, else from its nonzero cells. Returns the gains, the class counts
+    # per node and, per node and column, the number of children and of children with more than one class.
+    n_columns = x.shape[1]
+    class_counts = np.bincount(node_of_row * n_classes + y[rows], minlength=n_nodes * n_classes)
+    class_counts = class_counts.reshape(n_nodes, n_classes)
+    node_n = class_counts.sum(1)
+    group = node_of_row[:, None] * n_columns + np.arange(n_columns)
+    key = ((group * n_categories + x[rows]) * n_classes + y[rows][:, None]).ravel()
+    n_cells = n_nodes * n_columns * n_categories
+    if n_cells * n_classes <= 4 * len(key):
+        counts = np.bincount(key, minlength=n_cells * n_classes).reshape(n_nodes * n_columns, n_categories, n_classes)
+        cell_n = counts.sum(2)
+        n_children = np.count_nonzero(cell_n, axis=1)
+        n_mixed = np.sum(np.count_nonzero(counts, axis=2) > 1, axis=1)
+        if criterion == 'entropy':
+            child = xlogx(cell_n).sum(1) - xlogx(counts).sum((1, 2))
+        else:
+            child = np.sum(cell_n - np.sum(counts ** 2, axis=2) / np.maximum(cell_n, 1), axis=1)
+    else:
+        cell_class, cell_class_n = np.unique(key, return_counts=True)
+        cell, cell_of_class = np.unique(cell_class // n_classes, return_inverse=True)
+        cell_n = np.bincount(cell_of_class, weights=cell_class_n)
+        cell_group = cell // n_categories
+        n_children = np.bincount(cell_group, minlength=n_nodes * n_columns)
+        n_mixed = np.bincount(cell_group, weights=np.bincount(cell_of_class) > 1, minlength=n_nodes * n_columns)
+        if criterion == 'entropy':
+            child = np.bincount(cell_group, weights=xlogx(cell_n), minlength=n_nodes * n_columns)
+            child -= np.bincount(cell_group[cell_of_class], weights=xlogx(cell_class_n),
+                                 minlength=n_nodes * n_columns)
+        else:
+            purity = np.bincount(cell_of_class, weights=cell_class_n.astype(float) ** 2) / cell_n
+            child = np.bincount(cell_group, weights=cell_n - purity, minlength=n_nodes * n_columns)
+    # Sum over children of n_child / n * impurity(child), written with counts only
+    if criterion == 'entropy':
+        parent = np.log2(node_n) - xlogx(class_counts).sum(1) / node_n
+    else:
+        parent = 1 - np.sum(class_counts ** 2, axis=1) / node_n ** 2
+    gains = parent[:, None] - child.reshape(n_nodes, n_columns) / node_n[:, None]
+    return gains, class_counts, n_children.reshape(n_nodes, n_columns), n_mixed.reshape(n_nodes, n_columns)
+
+
+def reference_impurity(label_list, criterion='entropy'):
+    # Impurity with the arithmetic of calculate_entropy / calculate_gini, term by term in Counter order
+    impurity = 0
+    counts = Counter(label_list)
+    for key in counts.keys():
+        probability = float(counts[key]) / len(label_list)
+        if criterion == 'entropy':
+            impurity -= probability * np.log2(probability)
+        else:
+            impurity += probability ** 2
+    return impurity if criterion == 'entropy' else 1 - impurity
+
+
+def reference_gain(value_list, label_list, parent_impurity, criterion='entropy'):
+    # Gain with the arithmetic of compare_information_gain, children summed in set() order
+    new_impurity = 0
+    for category in set(value_list):
+        child = [label for value, label in zip(value_list, label_list) if value == category]
+        new_impurity += len(child) / len(label_list) * reference_impurity(child, criterion)
+    return parent_impurity - new_impurity
+
+
+def majority_label(y_node):
+    # Most frequent label; ties go to the label seen first, like max(label_list, key=label_list.count)
+    counts = np.bincount(y_node)
+    return y_node[np.isin(y_node, np.flatnonzero(counts == counts.max()))][0]
+
+
+def grow_decision_tree(codes, categories, attribute, sample_attribute_number=None, criterion='entropy', rng=None,
+                       tol=1e-12):
+    # Same nested-dict tree as create_decision_tree, built level by level on an integer-coded matrix from
+    # encode_columns. The last column is the label and attribute ends with the label name. Every level computes
+    # the gains of all its nodes at once; the rows stay in their original order, so ties and set() orders match
+    # the recursion.
+    # With sample_attribute_number, every node picks that many of its remaining attributes with rng.sample
+    # (the random module by default), as the random forest does; the samples are drawn level by level.
+    # Gains within tol of the best are recomputed with the arithmetic of the recursive version, so rounding breaks
+    # mathematically tied gains the same way and the first attribute with the maximal gain wins.
+    if criterion not in ['entropy', 'gini']:
+        raise Exception("argument value error: criterion must be 'entropy' or 'gini'")
+    if rng is None:
+        rng = random
+    x = codes[:, :-1]
+    y = codes[:, -1]
+    labels = categories[-1]
+    n_classes = len(labels)
+    n_categories = max([len(column) for column in categories[:-1]] + [1])
+
+    # Nodes of the current level as (parent branch dict, key in it, remaining columns)
+    holder = {}
+    nodes = [(holder, 'root', list(range(x.shape[1])))]
+    rows = np.arange(len(y))
+    node_of_row = np.zeros(len(y), dtype=np.int64)
+    while len(nodes) > 0:
+        gains, class_counts, n_children, n_mixed = level_gains(x, y, rows, node_of_row, len(nodes), n_categories,
+                                                               n_classes, criterion)
+        gains = gains.tolist()
+        n_children = n_children.tolist()
+        n_mixed = n_mixed.tolist()
+        n_present = np.count_nonzero(class_counts, axis=1).tolist()
+        node_label = class_counts.argmax(1).tolist()
+        # Rows grouped by node, still in their original order within every node
+        order = np.argsort(node_of_row, kind='stable')
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(node_of_row, minlength=len(nodes)))]).tolist()
+        split_column = np.full(len(nodes), -1)
+        branches = []
+        for node, (parent, key, columns) in enumerate(nodes):
+            # If all instances belong to the same class
+            if n_present[node] == 1:
+                parent[key] = labels[node_label[node]]
+                continue
+            # If there are no more attributes that can be tested
+            if len(columns) == 0:
+                parent[key] = labels[majority_label(y[rows[order[bounds[node]:bounds[node + 1]]]])]
+                continue
+            # Decide the attribute to split, optionally among a random sample of the remaining ones
+            if sample_attribute_number is None:
+                candidates = list(range(len(columns)))
+            else:
+                candidates = rng.sample(range(0, len(columns)), min(sample_attribute_number, len(columns)))
+            best = max([gains[node][columns[j]] for j in candidates])
+            ties = [j for j in candidates if gains[node][columns[j]] >= best - tol]
+            # Splits into one child (gain exactly 0) or into pure children (gain exactly the node impurity) tie
+            # exactly, so only the other ties need the exact arithmetic
+            if len(ties) > 1 and any([n_children[node][columns[j]] > 1 and n_mixed[node][columns[j]] > 0
+                                      for j in ties]):
+                node_rows = rows[order[bounds[node]:bounds[node + 1]]]
+                label_list = [labels[code] for code in y[node_rows].tolist()]
+                parent_impurity = reference_impurity(label_list, criterion)
+                exact = []
+                for j in ties:
+                    if n_children[node][columns[j]] == 1:
+                        exact.append(0.0)
+                    elif n_mixed[node][columns[j]] == 0:
+                        exact.append(parent_impurity)
+                    else:
+                        value_list = [categories[columns[j]][code] for code in x[node_rows, columns[j]].tolist()]
+                        exact.append(reference_gain(value_list, label_list, parent_impurity, criterion))
+                ties = [ties[exact.index(max(exact))]]
+            branch_index = ties[0]
+            split_column[node] = columns[branch_index]
+            parent[key] = {attribute[columns[branch_index]]: {}}
+            branches.append((node, parent[key][attribute[columns[branch_index]]],
+                             columns[:branch_index] + columns[branch_index + 1:]))
+        # Route the rows of the split nodes to one child per (node, value)
+        keep = split_column[node_of_row] >= 0
+        rows = rows[keep]
+        node_of_row = node_of_row[keep]
+        child_key = node_of_row * n_categories + x[rows, split_column[node_of_row]]
+        child, first, node_of_row = np.unique(child_key, return_index=True, return_inverse=True)
+        # Children grouped by node, in the order their values first appear in the node
+        child_order = np.lexsort((first, child // n_categories))
+        n_branches = np.bincount(child // n_categories, minlength=len(split_column)).tolist()
+        child_value = (child % n_categories)[child_order].tolist()
+        child_order = child_order.tolist()
+        nodes = [None] * len(child)
+        start = 0
+        for node, branch, remaining in branches:
+            end = start + n_branches[node]
+            node_categories = categories[split_column[node]]
+            value_of = {node_categories[value]: i for value, i in zip(child_value[start:end], child_order[start:end])}
+            # Branch on the values present in the node, in the order set() visits them
+            for category in set(list(value_of)):
+                branch[category] = None
+                nodes[value_of[category]] = (branch, category, remaining)
+            start = end
+    return holder['root']
+
+
+def build_decision_tree(data_input, attribute, sample_attribute_number=None, criterion='entropy', rng=None):
+    # Drop-in replacement for create_decision_tree on a list-of-lists table
+    codes, categories = encode_columns(data_input)
+    return grow_decision_tree(codes, categories, attribute, sample_attribute_number, criterion, rng)
+
+
+class CompiledTree:
+    # Nested-dict tree flattened into parallel arrays (preorder) for batch prediction. Node i tests the
+    # attribute feature[i] (-1 for a leaf); its child for the k-th value of vocab[feature[i]] is child[offset[i] + k],
+    # or -1 when the tree has no such branch. value[i] is the label of a leaf, or the majority label of the leaves
+    # below an inner node, which is the prediction for rows whose value the tree has never seen at that node.
+
+    def __init__(self, tree, attribute_list):
+        vocab = {}
+        self.collect_vocab(tree, attribute_list, vocab)
+        self.features = sorted(vocab)
+        self.vocab = [np.array(sorted(vocab[feature])) for feature in self.features]
+        self.position = [{category: k for k, category in enumerate(values.tolist())} for values in self.vocab]
+        self.feature = []
+        self.value = []
+        self.offset = []
+        self.end = []
+        self.child = []
+        self.compile(tree, attribute_list)
+        self.feature = np.array(self.feature)
+        self.offset = np.array(self.offset)
+        self.child = np.array(self.child, dtype=np.int64)
+        self.value = np.array(self.subtree_majority())
+
+    def collect_vocab(self, tree, attribute_list, vocab):
+        if type(tree).__name__ == "dict":
+            label = list(tree.keys())[0]
+            values = vocab.setdefault(attribute_list.index(label), set())
+            for category, subtree in tree[label].items():
+                values.add(category)
+                self.collect_vocab(subtree, attribute_list, vocab)
+
+    def compile(self, tree, attribute_list):
+        # Append the subtree in preorder and return the index of its root
+        node = len(self.feature)
+        self.value.append(tree if type(tree).__name__ != "dict" else None)
+        self.end.append(None)
+        if type(tree).__name__ != "dict":
+            self.feature.append(-1)
+            self.offset.append(-1)
+        else:
+            label = list(tree.keys())[0]
+            feature = self.features.index(attribute_list.index(label))
+            self.feature.append(feature)
+            self.offset.append(len(self.child))
+            self.child.extend([-1] * len(self.vocab[feature]))
+            for category, subtree in tree[label].items():
+                self.child[self.offset[node] + self.position[feature][category]] = self.compile(subtree, attribute_list)
+        self.end[node] = len(self.feature)
+        return node
+
+    def subtree_majority(self):
+        # Majority leaf label of every subtree (a preorder range), ties to the label of the earliest leaf,
+        # like max(leaves, key=leaves.count)
+        n_nodes = len(self.feature)
+        leaf = np.flatnonzero(self.feature < 0)
+        leaf_labels, leaf_code = np.unique(np.array([self.value[i] for i in leaf]), return_inverse=True)
+        one_hot = np.zeros((n_nodes, len(leaf_labels)), dtype=np.int64)
+        one_hot[leaf, leaf_code] = 1
+        cumulative = np.concatenate([np.zeros((1, len(leaf_labels)), dtype=np.int64), np.cumsum(one_hot, 0)])
+        start = np.arange(n_nodes)
+        counts = cumulative[self.end] - cumulative[start]
+        # First leaf of every label inside every subtree
+        first_leaf = np.full((n_nodes, len(leaf_labels)), n_nodes)
+        for code in range(len(leaf_labels)):
+            positions = np.append(leaf[leaf_code == code], n_nodes)
+            first_leaf[:, code] = positions[np.searchsorted(positions, start)]
+        tied = counts == counts.max(1, keepdims=True)
+        return leaf_labels[np.argmin(np.where(tied, first_leaf, n_nodes), axis=1)]
+
+    def encode(self, x):
+        # Position of every row's value in the vocabulary of every tested attribute, -1 if unseen
+        x = np.asarray(x)
+        codes = np.empty((len(x), len(self.features)), dtype=np.int64)
+        for j, feature in enumerate(self.features):
+            values = x[:, feature]
+            position = np.minimum(np.searchsorted(self.vocab[j], values), len(self.vocab[j]) - 1)
+            codes[:, j] = np.where(self.vocab[j][position] == values, position, -1)
+        return codes
+
+    def predict_batch(self, x):
+        # Route all rows down the tree together, one level per step
+        codes = self.encode(x)
+        node = np.zeros(len(codes), dtype=np.int64)
+        active = np.flatnonzero(self.feature[node] >= 0)
+        while len(active) > 0:
+            code = codes[active, self.feature[node[active]]]
+            child = np.where(code >= 0, self.child[self.offset[node[active]] + code], -1)
+            # Rows without a branch stop at their inner node and take its majority label
+            active = active[child >= 0]
+            node[active] = child[child >= 0]
+            active = active[self.feature[node[active]] >= 0]
+        return self.value[node]
@@ -3,6 +3,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 from sklearn.utils import shuffle
 from sklearn.model_selection import train_test_split
+from knn import KNNClassifier
 
 if __name__ == '__main__':
     # Load the dataset
@@ -28,16 +29,9 @@ if __name__ == '__main__':
 
         # Train the k-NN algorithm using training set
         accuracy = []
-        for k in k_list:
-            correct = 0
-            for index1, row1 in X_train.iterrows():
-                x = row1.values
-                distance = [np.sqrt(np.sum((row2.values - x) ** 2)) for index2, row2 in X_train.iterrows()]
-                idx_sort = np.argsort(distance)
-                y_idx_sort = y_train.values[idx_sort]
-                y_top_k = y_idx_sort[:k]
-                if max(y_top_k.tolist(), key=y_top_k.tolist().count) == y_train[index1]:
-                    correct += 1
+        y_pred_k = KNNClassifier(tie_break='nearest').fit(X_train, y_train).predict_many_k(X_train, k_list)
+        for y_pred in y_pred_k:
+            correct = np.sum(y_pred == y_train.values)
             accuracy.append(correct / len(y_train))
 
         # Compute the accuracy of the k-NN model making predictions for training set
@@ -0,0 +1,339 @@
+import numpy as np
+
+
+def distance_blocks(x, y, block_size=256, exact=False):
+    # Yield (start, distances) for consecutive row blocks of x against every row of y
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if exact:
+        # Bound the (block, n_y, n_features) difference tensor to ~4M elements
+        block_size = max(1, min(block_size, (1 << 22) // max(1, y.shape[0] * y.shape[1])))
+    else:
+        y_sq = np.einsum('ij,ij->i', y, y)
+    for start in range(0, x.shape[0], block_size):
+        block = x[start:start + block_size]
+        if exact:
+            # Same arithmetic as the per-row sqrt(sum((a - b) ** 2)) loop
+            distance = np.sqrt(np.sum((block[:, np.newaxis, :] - y[np.newaxis, :, :]) ** 2, axis=2))
+        else:
+            # ||a||^2 + ||b||^2 - 2ab, clipped at zero against rounding
+            distance = block @ y.T
+            distance *= -2
+            distance += np.einsum('ij,ij->i', block, block)[:, np.newaxis]
+            distance += y_sq
+            np.maximum(distance, 0, out=distance)
+            np.sqrt(distance, out=distance)
+        yield start, distance
+
+
+def pairwise_distances(x, y, block_size=256, exact=False):
+    # Full Euclidean distance matrix between the rows of x and the rows of y
+    distances = np.empty((len(x), len(y)))
+    for start, distance in distance_blocks(x, y, block_size, exact):
+        distances[start:start + len(distance)] = distance
+    return distances
+
+
+class SpatialTree:
+    # Binary space partition over the rows of data; leaves hold at most leaf_size rows, except nodes whose rows
+    # all coincide. Every node keeps a bound on its rows (defined by the subclass) used to prune the search.
+    # The rows of node i are index[start[i]:end[i]], so the leaves need no padding whatever their size.
+    def __init__(self, data, leaf_size=40):
+        self.data = np.asarray(data, dtype=float)
+        self.leaf_size = max(1, leaf_size)
+        self.index = np.arange(len(self.data))
+        self.start = []
+        self.end = []
+        self.left = []
+        self.right = []
+        self.depth = 0
+        node_bounds = []
+        self.build(0, len(self.data), node_bounds)
+        self.start = np.array(self.start)
+        self.end = np.array(self.end)
+        self.left = np.array(self.left)
+        self.right = np.array(self.right)
+        self.set_bounds(node_bounds)
+
+    def build(self, start, end, node_bounds, depth=0):
+        node = len(self.start)
+        self.depth = max(self.depth, depth)
+        self.start.append(start)
+        self.end.append(end)
+        self.left.append(-1)
+        self.right.append(-1)
+        points = self.data[self.index[start:end]]
+        node_bounds.append(self.node_bound(points))
+        if end - start > self.leaf_size:
+            # Split at the median of the dimension with the largest spread
+            spread = points.max(axis=0) - points.min(axis=0)
+            dim = np.argmax(spread)
+            if spread[dim] > 0:
+                mid = (start + end) // 2
+                order = np.argpartition(points[:, dim], mid - start)
+                self.index[start:end] = self.index[start:end][order]
+                self.left[node] = self.build(start, mid, node_bounds, depth + 1)
+                self.right[node] = self.build(mid, end, node_bounds, depth + 1)
+        return node
+
+    def node_bound(self, points):
+        # Bound of one node from its rows, as a tuple of arrays
+        raise NotImplementedError
+
+    def set_bounds(self, bounds):
+        # Stack the per-node bounds into arrays indexed by node
+        raise NotImplementedError
+
+    def min_distance(self, x, nodes):
+        # Lower bound on the distance from every row of x to every row of the matching node in nodes
+        raise NotImplementedError
+
+    def child_bounds(self, x, nodes):
+        # Bounds of the nodes, and the key that picks the child searched first: the bound itself unless a subclass
+        # has a better guess
+        bounds = self.min_distance(x, nodes)
+        return bounds, bounds
+
+    def visit_leaves(self, x, queries, leaves, best_idx, best_dist):
+        # Merge the rows of leaves[i] into the k nearest of queries[i], for all the pairs in one vectorised step.
+        # The leaves are padded to the widest of this step only.
+        sizes = self.end[leaves] - self.start[leaves]
+        column = np.arange(sizes.max())
+        valid = column < sizes[:, np.newaxis]
+        first = self.start[leaves][:, np.newaxis]
+        rows = self.index[np.where(valid, first + column, first)]
+        dist = np.sqrt(np.sum((self.data[rows] - x[queries, np.newaxis, :]) ** 2, axis=2))
+        dist[~valid] = np.inf
+        dist = np.concatenate([best_dist[queries], dist], axis=1)
+        rows = np.concatenate([best_idx[queries], rows], axis=1)
+        keep = np.argpartition(dist, best_dist.shape[1] - 1, axis=1)[:, :best_dist.shape[1]]
+        best_dist[queries] = np.take_along_axis(dist, keep, axis=1)
+        best_idx[queries] = np.take_along_axis(rows, keep, axis=1)
+
+    def query(self, x, k=1, block_size=256):
+        # Indices and distances of the k nearest rows for every row of x, nearest first.
+        # Depth-first branch and bound, run for a block of queries side by side: every query keeps its own stack,
+        # pops one node per step, skips it when its bound exceeds the query's current k-th distance, scans it when
+        # it is a leaf, and otherwise pushes both children so that the nearer one is searched first.
+        x = np.asarray(x, dtype=float)
+        k = min(k, len(self.data))
+        indices = np.empty((len(x), k), dtype=int)
+        distances = np.empty((len(x), k))
+        for block_start in range(0, len(x), block_size):
+            block = x[block_start:block_start + block_size]
+            n = len(block)
+            best_idx = np.full((n, k), -1)
+            best_dist = np.full((n, k), np.inf)
+            # Descending one level pops one node and pushes two, so a stack never holds more than depth + 1 nodes
+            stack_node = np.zeros((n, self.depth + 2), dtype=int)
+            stack_bound = np.zeros((n, self.depth + 2))
+            top = np.ones(n, dtype=int)
+            active = np.arange(n)
+            while len(active):
+                top[active] -= 1
+                nodes = stack_node[active, top[active]]
+                visit = stack_bound[active, top[active]] <= best_dist[active].max(axis=1)
+                queries, nodes = active[visit], nodes[visit]
+                leaf = self.left[nodes] < 0
+                if leaf.any():
+                    self.visit_leaves(block, queries[leaf], nodes[leaf], best_idx, best_dist)
+                queries, nodes = queries[~leaf], nodes[~leaf]
+                if len(queries):
+                    children = np.column_stack([self.left[nodes], self.right[nodes]])
+                    x_pairs = np.repeat(block[queries], 2, axis=0)
+                    bounds, key = self.child_bounds(x_pairs, children.ravel())
+                    bounds, key = bounds.reshape(-1, 2), key.reshape(-1, 2)
+                    # Column 0 is pushed first, so it holds the farther child
+                    order = np.argsort(-key, axis=1, kind='stable')
+                    position = top[queries, np.newaxis] + np.arange(2)
+                    stack_node[queries[:, np.newaxis], position] = np.take_along_axis(children, order, axis=1)
+                    stack_bound[queries[:, np.newaxis], position] = np.take_along_axis(bounds, order, axis=1)
+                    top[queries] += 2
+                active = active[top[active] > 0]
+            order = np.argsort(best_dist, axis=1)
+            indices[block_start:block_start + n] = np.take_along_axis(best_idx, order, axis=1)
+            distances[block_start:block_start + n] = np.take_along_axis(best_dist, order, axis=1)
+        return indices, distances
+
+
+class KDTree(SpatialTree):
+    # Nodes are bounded by their axis-aligned bounding box
+    def node_bound(self, points):
+        return points.min(axis=0), points.max(axis=0)
+
+    def set_bounds(self, bounds):
+        self.lower = np.array([lower for lower, upper in bounds])
+        self.upper = np.array([upper for lower, upper in bounds])
+
+    def min_distance(self, x, nodes):
+        gap = np.maximum(self.lower[nodes] - x, 0) + np.maximum(x - self.upper[nodes], 0)
+        return np.sqrt(np.sum(gap ** 2, axis=1))
+
+
+class BallTree(SpatialTree):
+    # Nodes are bounded by the ball around their centroid, which stays tighter than a box in more dimensions
+    def node_bound(self, points):
+        centroid = points.mean(axis=0)
+        return centroid, np.sqrt(np.max(np.sum((points - centroid) ** 2, axis=1)))
+
+    def set_bounds(self, bounds):
+        self.centroid = np.array([centroid for centroid, radius in bounds])
+        self.radius = np.array([radius for centroid, radius in bounds])
+
+    def min_distance(self, x, nodes):
+        return self.child_bounds(x, nodes)[0]
+
+    def child_bounds(self, x, nodes):
+        # Overlapping balls often both bound at zero, so the child with the nearer centroid goes first
+        centroid_distance = np.sqrt(np.sum((self.centroid[nodes] - x) ** 2, axis=1))
+        return np.maximum(centroid_distance - self.radius[nodes], 0), centroid_distance
+
+
+def vote_counts(labels, n_classes, weights=None):
+    # Per-row (optionally weighted) count of every label code, for all rows in one bincount
+    rows = np.arange(len(labels))[:, np.newaxis]
+    bins = (rows * n_classes + labels).ravel()
+    weights = None if weights is None else np.broadcast_to(weights, labels.shape).ravel()
+    counts = np.bincount(bins, weights=weights, minlength=len(labels) * n_classes)
+    return counts.reshape(len(labels), n_classes)
+
+
+def first_seen(labels, n_classes, position=None):
+    # Smallest position (column index by default) at which every label code appears in each row
+    position = np.broadcast_to(np.arange(labels.shape[1]) if position is None else position, labels.shape)
+    seen = np.full((len(labels), n_classes), np.iinfo(int).max)
+    np.minimum.at(seen, (np.repeat(np.arange(len(labels)), labels.shape[1]), labels.ravel()), position.ravel())
+    return seen
+
+
+def vote_winner(counts, seen=None):
+    # Label code with the most votes. Ties go to the smallest code, or to the tied code seen first when seen is given.
+    if seen is None:
+        return np.argmax(counts, axis=1)
+    tied = counts == counts.max(axis=1, keepdims=True)
+    return np.argmin(np.where(tied, seen, np.iinfo(int).max), axis=1)
+
+
+def distance_weights(distances):
+    # Inverse-distance weights; a query with exact matches lets only those matches vote
+    with np.errstate(divide='ignore'):
+        weights = 1 / distances
+    exact_match = distances == 0
+    has_match = exact_match.any(axis=1)
+    weights[has_match] = exact_match[has_match]
+    return weights
+
+
+class KNNClassifier:
+    def __init__(self, n_neighbors=1, block_size=256, exact=False, algorithm='brute', leaf_size=40,
+                 weights='uniform', tie_break='smallest'):
+        self.n_neighbors = n_neighbors
+        self.block_size = block_size
+        self.exact = exact
+        self.algorithm = algorithm
+        self.leaf_size = leaf_size
+        self.weights = weights
+        self.tie_break = tie_break
+        self.x = None
+        self.y = None
+        self.classes = None
+        self.y_code = None
+        self.tree = None
+        if weights not in ('uniform', 'distance'):
+            raise Exception("argument value error: weights should be 'uniform' or 'distance'")
+        if tie_break not in ('smallest', 'nearest'):
+            raise Exception("argument value error: tie_break should be 'smallest' or 'nearest'")
+
+    def fit(self, x, y):
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y)
+        self.classes, self.y_code = np.unique(self.y, return_inverse=True)
+        if self.algorithm == 'kd_tree':
+            self.tree = KDTree(self.x, self.leaf_size)
+        elif self.algorithm == 'ball_tree':
+            self.tree = BallTree(self.x, self.leaf_size)
+        elif self.algorithm == 'brute':
+            self.tree = None
+        else:
+            raise Exception("argument value error: algorithm should be 'brute', 'kd_tree' or 'ball_tree'")
+        return self
+
+    def kneighbors(self, x, n_neighbors=None, return_distance=False):
+        # Indices of the training rows sorted by distance, nearest first
+        n_neighbors = self.n_neighbors if n_neighbors is None else n_neighbors
+        n_neighbors = min(n_neighbors, len(self.x))
+        if self.tree is not None:
+            neighbors, distances = self.tree.query(x, n_neighbors)
+            return (neighbors, distances) if return_distance else neighbors
+        neighbors = np.empty((len(x), n_neighbors), dtype=int)
+        distances = np.empty((len(x), n_neighbors))
+        for start, distance in distance_blocks(x, self.x, self.block_size, self.exact):
+            if n_neighbors < distance.shape[1]:
+                # Partial sort: select the n_neighbors nearest, then order only those
+                candidates = np.argpartition(distance, n_neighbors - 1, axis=1)[:, :n_neighbors]
+                order = np.argsort(np.take_along_axis(distance, candidates, axis=1), axis=1)
+                neighbors[start:start + len(distance)] = np.take_along_axis(candidates, order, axis=1)
+            else:
+                neighbors[start:start + len(distance)] = np.argsort(distance, axis=1)
+            if return_distance:
+                distances[start:start + len(distance)] = np.take_along_axis(
+                    distance, neighbors[start:start + len(distance)], axis=1)
+        return (neighbors, distances) if return_distance else neighbors
+
+    def vote(self, neighbors, distances=None, position=None):
+        # Predicted labels from the neighbour indices of every query at once
+        labels = self.y_code[neighbors]
+        weights = distance_weights(distances) if self.weights == 'distance' else None
+        seen = first_seen(labels, len(self.classes), position) if self.tie_break == 'nearest' else None
+        return self.classes[vote_winner(vote_counts(labels, len(self.classes), weights), seen)]
+
+    def predict(self, x):
+        if self.weights == 'distance':
+            return self.vote(*self.kneighbors(x, return_distance=True))
+        return self.vote(self.kneighbors(x))
+
+    def predict_learning_curve(self, x, n_sample_list):
+        # Predictions after dropping the first n_sample training rows, for every n_sample in n_sample_list.
+        # The full ranking is computed once. Sweeping n_sample from the largest down, the rows that come back
+        # are merged into the running k nearest by rank, so no step re-ranks the training set.
+        # Every n_sample must leave at least one training row.
+        n_sample_list = list(n_sample_list)
+        if any(n_sample < 0 or n_sample >= len(self.x) for n_sample in n_sample_list):
+            raise Exception("argument value error: n_sample should be between 0 and the training size - 1")
+        order, distances = self.kneighbors(x, len(self.x), return_distance=True)
+        rank = np.empty_like(order)
+        np.put_along_axis(rank, order, np.broadcast_to(np.arange(order.shape[1]), order.shape), axis=1)
+        best = np.empty((len(order), 0), dtype=int)
+        end = len(self.x)
+        y_pred = np.empty((len(n_sample_list), len(order)), dtype=self.y.dtype)
+        for i in np.argsort(n_sample_list, kind='stable')[::-1]:
+            start = n_sample_list[i]
+            if start < end:
+                best = np.concatenate([best, np.broadcast_to(np.arange(start, end), (len(order), end - start))], axis=1)
+                if best.shape[1] > self.n_neighbors:
+                    keep = np.argpartition(np.take_along_axis(rank, best, axis=1), self.n_neighbors - 1, axis=1)
+                    best = np.take_along_axis(best, keep[:, :self.n_neighbors], axis=1)
+                end = start
+            best_rank = np.take_along_axis(rank, best, axis=1)
+            y_pred[i] = self.vote(best, np.take_along_axis(distances, best_rank, axis=1), best_rank)
+        return y_pred
+
+    def predict_many_k(self, x, k_list):
+        # Rank the neighbours once up to max(k_list) and score every k from cumulative vote counts
+        k_list = list(k_list)
+        neighbors, distances = self.kneighbors(x, max(k_list), return_distance=True)
+        labels = self.y_code[neighbors]
+        weights = distance_weights(distances) if self.weights == 'distance' else np.ones(labels.shape)
+        seen = first_seen(labels, len(self.classes)) if self.tie_break == 'nearest' else None
+        rows = np.arange(len(labels))
+        counts = np.zeros((len(labels), len(self.classes)))
+        y_pred = np.empty((len(k_list), len(labels)), dtype=self.y.dtype)
+        done = 0
+        for i in np.argsort(k_list, kind='stable'):
+            k = min(k_list[i], labels.shape[1])
+            for j in range(done, k):
+                counts[rows, labels[:, j]] += weights[:, j]
+            done = max(done, k)
+            # A label that has not entered the first k yet cannot be tied for the lead, so seen stays valid
+            y_pred[i] = self.classes[vote_winner(counts, seen)]
+        return y_pred
@@ -2,61 +2,15 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sn
-from collections import Counter, defaultdict
+import naive_bayes
 from utils import *
-import math
-
-
-class MultinomialNaiveBayes:
-    def __init__(self, classes):
-        self.classes = classes
-        self.items = {}
-        self.log_priors = {}
-        self.word_counts = {}
-        self.vocab = set()
-
-    def group_data(self, x, y):
-        data = dict()
-        for c in self.classes:
-            data[c] = x[np.where(y == c)]
-        return data
-
-    def fit(self, x, y):
-        n = len(x)
-        grouped_data = self.group_data(x, y)
-        for c, data in grouped_data.items():
-            self.items[c] = len(data)
-            self.log_priors[c] = math.log(self.items[c] / n)
-            self.word_counts[c] = defaultdict(lambda: 0)
-            for text in data:
-                counts = Counter(text)
-                for word, count in counts.items():
-                    if word not in self.vocab:
-                        self.vocab.add(word)
-                    self.word_counts[c][word] += count
-        return self
-
-    def probability(self, word, text_class):
-        numerator = self.word_counts[text_class][word]
-        denominator = self.items[text_class]
-        if numerator / denominator == 0:
-            return math.log((np.finfo(float).eps + numerator) / denominator)
-        else:
-            return math.log(numerator / denominator)
-
-    def predict(self, x):
-        result = []
-        for text in x:
-            class_scores = {c: self.log_priors[c] for c in self.classes}
-            words = set(text)
-            for word in words:
-                if word not in self.vocab:
-                    continue
-                for c in self.classes:
-                    log_w_given_c = self.probability(word, c)
-                    class_scores[c] += log_w_given_c
-            result.append(max(class_scores, key=class_scores.get))
-        return result
+
+
+class MultinomialNaiveBayes(naive_bayes.MultinomialNaiveBayes):
+    def log_probability(self, alpha):
+        # No smoothing: log(count / items), with eps in place of the count of a word never seen in the class
+        numerator = np.where(self.word_counts == 0, np.finfo(float).eps, self.word_counts)
+        return np.log(numerator / self.items[:, None])
 
 
 def accuracy_score(y_true, y_pred):
@@ -117,7 +71,7 @@ if __name__ == "__main__":
     test_data = np.array(pos_test + neg_test, dtype=object)
     test_label = np.array(pos_test_label + neg_test_label, dtype=object)
 
-    predict_label = MNB.predict(test_data)
+    predict_label = MNB.predict(test_data, 0)
 
     accuracy = accuracy_score(test_label, predict_label)
     precision = precision_score(test_label, predict_label)
@@ -2,58 +2,8 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sn
-from collections import Counter, defaultdict
+from naive_bayes import MultinomialNaiveBayes
 from utils import *
-import math
-
-
-class MultinomialNaiveBayes:
-    def __init__(self, classes):
-        self.classes = classes
-        self.items = {}
-        self.log_priors = {}
-        self.word_counts = {}
-        self.vocab = set()
-
-    def group_data(self, x, y):
-        data = dict()
-        for c in self.classes:
-            data[c] = x[np.where(y == c)]
-        return data
-
-    def fit(self, x, y):
-        n = len(x)
-        grouped_data = self.group_data(x, y)
-        for c, data in grouped_data.items():
-            self.items[c] = len(data)
-            self.log_priors[c] = math.log(self.items[c] / n)
-            self.word_counts[c] = defaultdict(lambda: 0)
-            for text in data:
-                counts = Counter(text)
-                for word, count in counts.items():
-                    if word not in self.vocab:
-                        self.vocab.add(word)
-                    self.word_counts[c][word] += count
-        return self
-
-    def laplace_smoothing(self, word, text_class, alpha):
-        numerator = self.word_counts[text_class][word] + alpha
-        denominator = self.items[text_class] + alpha * len(self.vocab)
-        return math.log(numerator / denominator)
-
-    def predict(self, x, alpha):
-        result = []
-        for text in x:
-            class_scores = {c: self.log_priors[c] for c in self.classes}
-            words = set(text)
-            for word in words:
-                if word not in self.vocab:
-                    continue
-                for c in self.classes:
-                    log_w_given_c = self.laplace_smoothing(word, c, alpha)
-                    class_scores[c] += log_w_given_c
-            result.append(max(class_scores, key=class_scores.get))
-        return result
 
 
 def accuracy_score(y_true, y_pred):
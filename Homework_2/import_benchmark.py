@@ -0,0 +1,29 @@
+import sys
+import time
+import subprocess
+import numpy as np
+
+
+def time_import(statement, repeat=5):
+    # Median wall time of a fresh interpreter running statement, so every run pays the full cold import
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', statement], check=False, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return np.median(times)
+
+
+if __name__ == '__main__':
+    baseline = time_import('pass')
+    statements = [('bare interpreter', 'pass'),
+                  ('import utils', 'import utils'),
+                  ('import utils + stopwords', 'import utils; utils.stop_words()'),
+                  ('import utils + preprocess', "import utils; utils.preprocess_text('The movie was great!')"),
+                  ('old eager nltk import', "import nltk; from nltk.corpus import stopwords; "
+                                            "nltk.download('stopwords')")]
+    print('Cold start in seconds (median of 5 fresh interpreters)')
+    for name, statement in statements:
+        elapsed = time_import(statement)
+        print('%-26s total = %.3f  over bare interpreter = %.3f' % (name, elapsed, elapsed - baseline))
@@ -0,0 +1,61 @@
+import numpy as np
+from itertools import chain, repeat
+from scipy.sparse import csr_matrix
+
+
+def build_vocab_index(texts):
+    # Column index of every word of the token lists, in order of first appearance
+    return {word: i for i, word in enumerate(dict.fromkeys(chain.from_iterable(texts)))}
+
+
+def count_matrix(texts, vocab_index, binary=False):
+    # Sparse (document, word) count matrix of the token lists; words missing from vocab_index are dropped.
+    # With binary=True every word present in a document counts once
+    columns = np.fromiter(map(vocab_index.get, chain.from_iterable(texts), repeat(-1)), dtype=np.int64)
+    rows = np.repeat(np.arange(len(texts)), np.fromiter(map(len, texts), dtype=np.int64, count=len(texts)))
+    known = columns >= 0
+    matrix = csr_matrix((np.ones(np.sum(known)), (rows[known], columns[known])),
+                        shape=(len(texts), len(vocab_index)))
+    if binary:
+        matrix.data[:] = 1
+    return matrix
+
+
+class MultinomialNaiveBayes:
+    # Naive Bayes over the words of a document. fit sums the word counts of every class from a sparse
+    # document-term matrix and keeps them, so the log-probability table of any alpha is one vectorized op;
+    # predict scores every test document against every class with one sparse x dense product of its word
+    # presence and the (word, class) log-probability matrix.
+    def __init__(self, classes):
+        self.classes = np.asarray(classes)
+        self.items = None
+        self.log_priors = None
+        self.word_counts = None
+        self.vocab_index = {}
+
+    def fit(self, x, y):
+        y = np.asarray(y)
+        self.vocab_index = build_vocab_index(x)
+        counts = count_matrix(x, self.vocab_index)
+        self.items = np.array([np.sum(y == c) for c in self.classes])
+        self.log_priors = np.log(self.items / len(x))
+        self.word_counts = np.vstack([np.asarray(counts[y == c].sum(axis=0)).ravel() for c in self.classes])
+        return self
+
+    def log_probability(self, alpha):
+        # (class, word) log-probabilities with Laplace smoothing
+        numerator = self.word_counts + alpha
+        denominator = self.items + alpha * len(self.vocab_index)
+        return np.log(numerator / denominator[:, None])
+
+    def predict(self, x, alpha):
+        return self.predict_many_alphas(x, [alpha])[0]
+
+    def predict_many_alphas(self, x, alphas):
+        # Predictions for every alpha in alphas from one pass over x: the log-probability tables of all the
+        # alphas are stacked and scored with a single product. Every word of the vocabulary present in a
+        # document adds its log-probability once
+        presence = count_matrix(x, self.vocab_index, binary=True)
+        table = np.vstack([self.log_probability(alpha) for alpha in alphas])
+        class_scores = (presence @ table.T).reshape(len(x), len(alphas), len(self.classes)) + self.log_priors
+        return [self.classes[idx].tolist() for idx in np.argmax(class_scores, axis=2).T]
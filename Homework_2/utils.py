@@ -2,62 +2,139 @@ import re
 import os
 import glob
 import random
-from nltk.corpus import stopwords
-import nltk
+import hashlib
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 
 REPLACE_NO_SPACE = re.compile("[._;:!`¦\'?,\"()\[\]]")
 REPLACE_WITH_SPACE = re.compile("(<br\s*/><br\s*/>)|(\-)|(\/)")
-nltk.download('stopwords')
+REMOVE_DIGITS = re.compile(r'\d+')
+CACHE_DIR = '.token_cache'
+CACHE_BUILD_FRACTION = 0.2  # smallest share of a directory's files whose load builds a missing cache
+STOP_WORDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stopwords_english.txt')
+STOP_WORDS = None
+
+
+def stop_words():
+    # English stopword set, loaded once per process on first use and never from the network: the list bundled
+    # next to this file (NLTK's English list), else an NLTK stopwords corpus already installed on the machine
+    global STOP_WORDS
+    if STOP_WORDS is None:
+        if os.path.exists(STOP_WORDS_FILE):
+            with open(STOP_WORDS_FILE, 'r', encoding='UTF-8') as f:
+                STOP_WORDS = set(f.read().split())
+        else:
+            from nltk.corpus import stopwords
+            STOP_WORDS = set(stopwords.words('english'))
+    return STOP_WORDS
 
 
 def preprocess_text(text):
-    stop_words = set(stopwords.words('english'))
+    stop_word_set = stop_words()
     text = REPLACE_NO_SPACE.sub("", text)
     text = REPLACE_WITH_SPACE.sub(" ", text)
-    text = re.sub(r'\d+', '', text)
+    text = REMOVE_DIGITS.sub('', text)
     text = text.lower()
     words = text.split()
-    return [w for w in words if w not in stop_words]
+    return [w for w in words if w not in stop_word_set]
+
+
+def tokenize_file(filename):
+    # Token list of one review file; module level so the process pool can unpickle it
+    with open(os.path.join(os.getcwd(), filename), 'r', encoding='UTF-8') as f:
+        return preprocess_text(f.read())
+
+
+def stream_token_lists(filenames, n_jobs=-1, chunksize=64):
+    # Token lists of the files, in order, yielded as soon as they are ready. The files are tokenized in a
+    # process pool of n_jobs workers (n_jobs=-1 uses every core, n_jobs=1 tokenizes in this process)
+    if n_jobs < 0:
+        n_jobs = os.cpu_count()
+    if n_jobs <= 1 or len(filenames) <= chunksize:
+        yield from map(tokenize_file, filenames)
+        return
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        yield from executor.map(tokenize_file, filenames, chunksize=chunksize)
+
+
+def cache_key(filenames):
+    # Hash of the preprocessing settings and of the path, size and mtime of every file; any change to them
+    # invalidates the token cache
+    key = hashlib.sha1()
+    for pattern in [REPLACE_NO_SPACE.pattern, REPLACE_WITH_SPACE.pattern, REMOVE_DIGITS.pattern]:
+        key.update(pattern.encode('UTF-8') + b'\0')
+    key.update(' '.join(sorted(stop_words())).encode('UTF-8') + b'\0')
+    for filename in filenames:
+        stat = os.stat(filename)
+        key.update(('%s %d %d\n' % (filename, stat.st_size, stat.st_mtime_ns)).encode('UTF-8'))
+    return key.hexdigest()
+
+
+def load_token_cache(pattern, filenames, n_jobs=-1, build=True):
+    # Token ids of all the files matching pattern as one flat array with per-file offsets, plus the words of
+    # the ids. Read memory-mapped from CACHE_DIR when the files and settings are unchanged, otherwise
+    # tokenized again and written back, or None when build is False
+    path = os.path.join(CACHE_DIR, re.sub(r'\W+', '_', pattern))
+    key = cache_key(filenames)
+    if os.path.exists(os.path.join(path, 'key.txt')):
+        with open(os.path.join(path, 'key.txt'), 'r') as f:
+            cached = f.read() == key
+        if cached:
+            ids = np.load(os.path.join(path, 'ids.npy'), mmap_mode='r')
+            offsets = np.load(os.path.join(path, 'offsets.npy'))
+            with open(os.path.join(path, 'vocab.txt'), 'r', encoding='UTF-8') as f:
+                words = f.read().split('\n')
+            return ids, offsets, words
+    if not build:
+        return None
+    vocab_index = {}
+    ids = []
+    offsets = [0]
+    for contents in stream_token_lists(filenames, n_jobs):
+        ids.extend(vocab_index.setdefault(word, len(vocab_index)) for word in contents)
+        offsets.append(len(ids))
+    ids = np.array(ids, dtype=np.int32)
+    offsets = np.array(offsets, dtype=np.int64)
+    words = list(vocab_index)
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, 'ids.npy'), ids)
+    np.save(os.path.join(path, 'offsets.npy'), offsets)
+    with open(os.path.join(path, 'vocab.txt'), 'w', encoding='UTF-8') as f:
+        f.write('\n'.join(words))
+    # The key goes last, so an interrupted write is never taken for a valid cache
+    with open(os.path.join(path, 'key.txt'), 'w') as f:
+        f.write(key)
+    return ids, offsets, words
+
+
+def load_token_lists(pattern, percentage, n_jobs=-1, cache=True):
+    # Token lists of the files matching pattern, each kept with probability percentage (one random draw per
+    # file, in glob order). With cache=True a valid cache in CACHE_DIR is always read; a missing or stale one is
+    # rebuilt by tokenizing every file only when at least CACHE_BUILD_FRACTION of the files are kept, so small
+    # samples tokenize just their own files
+    filenames = glob.glob(pattern)
+    kept = [i for i in range(len(filenames)) if random.random() <= percentage]
+    cached = None
+    if cache:
+        build = len(kept) >= CACHE_BUILD_FRACTION * len(filenames)
+        cached = load_token_cache(pattern, filenames, n_jobs, build)
+    if cached is None:
+        return list(stream_token_lists([filenames[i] for i in kept], n_jobs))
+    ids, offsets, words = cached
+    words = np.array(words, dtype=object)
+    return [words[ids[offsets[i]:offsets[i + 1]]].tolist() for i in kept]
 
 
-def load_training_set(percentage_positives, percentage_negatives):
+def load_training_set(percentage_positives, percentage_negatives, n_jobs=-1, cache=True):
+    positive_instances = load_token_lists('train/pos/*.txt', percentage_positives, n_jobs, cache)
+    negative_instances = load_token_lists('train/neg/*.txt', percentage_negatives, n_jobs, cache)
     vocab = set()
-    positive_instances = []
-    negative_instances = []
-    for filename in glob.glob('train/pos/*.txt'):
-        if random.random() > percentage_positives:
-            continue
-        with open(os.path.join(os.getcwd(), filename), 'r', encoding='UTF-8') as f:
-            contents = f.read()
-            contents = preprocess_text(contents)
-            positive_instances.append(contents)
-            vocab = vocab.union(set(contents))
-    for filename in glob.glob('train/neg/*.txt'):
-        if random.random() > percentage_negatives:
-            continue
-        with open(os.path.join(os.getcwd(), filename), 'r', encoding='UTF-8') as f:
-            contents = f.read()
-            contents = preprocess_text(contents)
-            negative_instances.append(contents)
-            vocab = vocab.union(set(contents))
+    for contents in positive_instances + negative_instances:
+        vocab.update(contents)
     return positive_instances, negative_instances, vocab
 
 
-def load_test_set(percentage_positives, percentage_negatives):
-    positive_instances = []
-    negative_instances = []
-    for filename in glob.glob('test/pos/*.txt'):
-        if random.random() > percentage_positives:
-            continue
-        with open(os.path.join(os.getcwd(), filename), 'r', encoding='UTF-8') as f:
-            contents = f.read()
-            contents = preprocess_text(contents)
-            positive_instances.append(contents)
-    for filename in glob.glob('test/neg/*.txt'):
-        if random.random() > percentage_negatives:
-            continue
-        with open(os.path.join(os.getcwd(), filename), 'r', encoding='UTF-8') as f:
-            contents = f.read()
-            contents = preprocess_text(contents)
-            negative_instances.append(contents)
+def load_test_set(percentage_positives, percentage_negatives, n_jobs=-1, cache=True):
+    positive_instances = load_token_lists('test/pos/*.txt', percentage_positives, n_jobs, cache)
+    negative_instances = load_token_lists('test/neg/*.txt', percentage_negatives, n_jobs, cache)
     return positive_instances, negative_instances
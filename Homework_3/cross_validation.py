@@ -0,0 +1,94 @@
+import os
+import random
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
+BLAS_THREAD_VARIABLES = ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS',
+                         'NUMEXPR_NUM_THREADS']
+
+
+def stratified_k_fold(y, n_folds=10, rounding='floor', seed=None):
+    # Row indices of stratified folds from a single permutation of the rows.
+    # Every fold but the last takes fold_size rows of each class, where fold_size is int(n_class / n_folds)
+    # for rounding='floor' or ceil(n_class / n_folds) for rounding='ceil'; the last fold takes the rest.
+    if rounding not in ['floor', 'ceil']:
+        raise Exception("argument value error: rounding must be 'floor' or 'ceil'")
+    classes, first, code = np.unique(np.asarray(y), return_index=True, return_inverse=True)
+    # Shuffle once, then group the shuffled rows by class (in order of appearance) with a stable sort
+    order = np.random.default_rng(seed).permutation(len(code))
+    rank = np.argsort(np.argsort(first))
+    order = order[np.argsort(rank[code[order]], kind='stable')]
+    class_size = np.bincount(rank[code], minlength=len(classes))
+    class_start = np.concatenate([[0], np.cumsum(class_size)[:-1]])
+    if rounding == 'floor':
+        fold_size = class_size // n_folds
+    else:
+        fold_size = -(-class_size // n_folds)
+    folds = []
+    for fold_idx in range(n_folds):
+        lo = np.minimum(class_start + fold_idx * fold_size, class_start + class_size)
+        hi = np.minimum(lo + fold_size, class_start + class_size)
+        if fold_idx == n_folds - 1:
+            hi = class_start + class_size
+        folds.append(np.concatenate([order[l:h] for l, h in zip(lo, hi)]))
+    return folds
+
+
+def task_seeds(n_tasks, seed=None):
+    # Independent seeds, one per task, spawned from a single root seed
+    return [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(seed).spawn(n_tasks)]
+
+
+def run_task(func, task, seed):
+    # Seed the global generators (random, np.random and therefore pandas sample) before running the task, and
+    # restore their previous state afterwards, so a task run in the caller's process leaves its generators as
+    # they were
+    random_state = random.getstate()
+    np_random_state = np.random.get_state()
+    random.seed(seed)
+    np.random.seed(seed)
+    try:
+        return func(task, seed)
+    finally:
+        random.setstate(random_state)
+        np.random.set_state(np_random_state)
+
+
+def limit_blas_threads(n_threads):
+    # Cap the BLAS and OpenMP thread pools of a worker process, so n_jobs workers do not oversubscribe the cores.
+    # The environment variables cover pools started after this call, threadpoolctl (when installed) the loaded ones
+    for name in BLAS_THREAD_VARIABLES:
+        os.environ[name] = str(n_threads)
+    if threadpool_limits is not None:
+        threadpool_limits(n_threads)
+
+
+def parallel_map(func, tasks, n_jobs=1, seed=None, blas_threads=1):
+    # Run func(task, seed) for every task in a process pool and return the results in task order.
+    # Every task is seeded on its own, so the results do not depend on n_jobs; n_jobs=-1 uses every core.
+    # Every worker runs its BLAS with blas_threads threads (None leaves the library default).
+    # func must be defined at module level so the workers can unpickle it.
+    tasks = list(tasks)
+    seeds = task_seeds(len(tasks), seed)
+    if n_jobs < 0:
+        n_jobs = os.cpu_count()
+    n_jobs = min(n_jobs, len(tasks))
+    if n_jobs <= 1:
+        return [run_task(func, task, task_seed) for task, task_seed in zip(tasks, seeds)]
+    initializer = None if blas_threads is None else limit_blas_threads
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=initializer, initargs=(blas_threads,)) as executor:
+        return list(executor.map(run_task, [func] * len(tasks), tasks, seeds))
+
+
+def grid_search(func, grid, k_fold, n_jobs=-1, seed=None):
+    # Cross-validated table of func over a parameter grid: func(task, seed) returns a tuple of metrics for
+    # task = (k_fold, fold_idx, parameters). Every (parameters, fold) pair runs as its own task in one process
+    # pool; each row of the table is the parameters followed by the metrics averaged over the folds
+    tasks = [(k_fold, fold_idx, parameters) for parameters in grid for fold_idx in range(len(k_fold))]
+    results = np.array(parallel_map(func, tasks, n_jobs=n_jobs, seed=seed), dtype=float)
+    metrics = results.reshape(len(grid), len(k_fold), -1).mean(axis=1)
+    return np.hstack([np.array(grid, dtype=float), metrics])
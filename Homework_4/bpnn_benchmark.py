@@ -0,0 +1,66 @@
+import time
+import numpy as np
+import pandas as pd
+from bpnn import BPNNClassifier
+
+
+class CountedArray(np.ndarray):
+    # ndarray that counts every array NumPy derives from it (results of operators and ufuncs, views, copies)
+    created = 0
+
+    def __array_finalize__(self, obj):
+        CountedArray.created += 1
+
+
+def minmax_scale(df_in):
+    df_norm = (df_in - df_in.min()) / (df_in.max() - df_in.min())
+    return df_norm
+
+
+def load_wine():
+    df = pd.read_csv('hw3_wine.csv', sep='\t')
+    col_class = df.pop('# class')
+    return minmax_scale(df).values, col_class.values - 1
+
+
+def allocating_epoch(classifier, x, y):
+    # One epoch of per-sample SGD the way it ran before the buffers: every step allocates its activations,
+    # gradients and weight updates
+    for xi, yi in zip(x, y):
+        classifier.forward_propagation(xi)
+        classifier.back_propagation(yi)
+        for d in range(classifier.hid_l):
+            layer_input = xi if d == 0 else classifier.values[d - 1]
+            delta = classifier.grad[d].reshape(-1, 1) @ layer_input.reshape(1, -1)
+            classifier.weights[d] += delta * classifier.eta * (1 - classifier.lmbda)
+
+
+def buffered_epochs(classifier, x, y, n_epochs):
+    classifier.max_iter = n_epochs
+    classifier.standard_bp(x, y)
+
+
+def measure(run, classifier, x, y):
+    # Arrays created and seconds taken by run, with the network's weights and data counting their derived arrays
+    classifier.weights = [weight.view(CountedArray) for weight in classifier.weights]
+    x = x.view(CountedArray)
+    y = y.view(CountedArray)
+    CountedArray.created = 0
+    start = time.perf_counter()
+    run(classifier, x, y)
+    return CountedArray.created, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    np.random.seed(587)
+    x, y = load_wine()
+    print('Per-sample SGD on the wine data (%d rows), arrays created and seconds per epoch' % len(x))
+    for hid_l, hid_n, out_n in [(2, 4, 3), (4, 8, 3), (8, 16, 3)]:
+        classifier = BPNNClassifier(in_n=13, hid_l=hid_l, hid_n=hid_n, out_n=out_n)
+        x_train, y_train = classifier.preprocessing(x, y)
+        before = measure(allocating_epoch, classifier, x_train, y_train)
+        # The buffers are set up once per fit, so the per-epoch count is the difference between 3 and 1 epochs
+        one = measure(lambda c, xs, ys: buffered_epochs(c, xs, ys, 1), classifier, x_train, y_train)
+        three = measure(lambda c, xs, ys: buffered_epochs(c, xs, ys, 3), classifier, x_train, y_train)
+        print('%d x %2d hidden  allocating: %6d arrays %.3f s  buffered: %d arrays per epoch (%d per fit) %.3f s' %
+              (hid_l, hid_n, before[0], before[1], (three[0] - one[0]) // 2, one[0], (three[1] - one[1]) / 2))